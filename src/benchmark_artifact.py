@@ -0,0 +1,111 @@
+"""Benchmark load time and memory of the joblib pickle vs the compact artifact.
+
+Trains the RandomForest fallback model on the processed data, saves it both
+with `joblib.dump` and with `model_artifact.save_forest_artifact`, then loads
+each file in a fresh subprocess and reports:
+- file size on disk
+- load time
+- private (anonymous) RSS added by loading and predicting
+- shared (file-backed) RSS, which the page cache shares across workers
+
+Memory figures come from /proc/self/status and are Linux-only; on other
+platforms only sizes and load times are reported.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from model import load_data, prepare_features
+from model_artifact import load_forest_artifact, save_forest_artifact
+
+
+def _rss_kb():
+    """Return (anonymous, file-backed) resident memory in kB, or (None, None)."""
+    status = Path('/proc/self/status')
+    if not status.exists():
+        return None, None
+    fields = {}
+    for line in status.read_text().splitlines():
+        key, _, rest = line.partition(':')
+        if key in ('RssAnon', 'RssFile'):
+            fields[key] = int(rest.split()[0])
+    return fields.get('RssAnon'), fields.get('RssFile')
+
+
+def _worker(kind, model_path, data_path):
+    """Load one model file and print load/memory stats as JSON."""
+    X, _ = prepare_features(load_data(data_path))
+    anon0, file0 = _rss_kb()
+    start = time.perf_counter()
+    if kind == 'joblib':
+        model = joblib.load(model_path)
+    else:
+        model = load_forest_artifact(model_path, verify=(kind == 'artifact_verified'))
+    load_s = time.perf_counter() - start
+    model.predict(X.head(256))
+    anon1, file1 = _rss_kb()
+    print(json.dumps({
+        'load_s': load_s,
+        'private_kb': None if anon0 is None else anon1 - anon0,
+        'shared_kb': None if file0 is None else file1 - file0,
+    }))
+
+
+def _run_worker(kind, model_path, data_path, repeats):
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, __file__, '--worker', kind, str(model_path), str(data_path)],
+            check=True, capture_output=True, text=True, cwd=Path(__file__).parent,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda r: r['load_s'])
+
+
+def main(data_path='data/processed/scraped_data.csv', repeats=3):
+    data_path = Path(data_path).resolve()
+    X, y = prepare_features(load_data(data_path))
+    rf = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+    rf.fit(X, y)
+    rf._model_type = 'random_forest'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        files = {
+            'joblib': tmp / 'rf_model.pkl',
+            'artifact_f64': tmp / 'rf_model_f64.rfa',
+            'artifact_f32': tmp / 'rf_model_f32.rfa',
+        }
+        joblib.dump(rf, files['joblib'])
+        save_forest_artifact(rf, files['artifact_f64'], quantize=False)
+        save_forest_artifact(rf, files['artifact_f32'], quantize=True)
+
+        max_err = float(np.abs(load_forest_artifact(files['artifact_f32']).predict(X) - rf.predict(X)).max())
+        cases = [
+            ('joblib pickle', 'joblib', files['joblib']),
+            ('artifact float64 (verified)', 'artifact_verified', files['artifact_f64']),
+            ('artifact float32 (verified)', 'artifact_verified', files['artifact_f32']),
+            ('artifact float32 (no verify)', 'artifact', files['artifact_f32']),
+        ]
+        print(f"{'format':<30}{'size MB':>10}{'load ms':>10}{'private MB':>12}{'shared MB':>11}")
+        for label, kind, path in cases:
+            r = _run_worker(kind, path, data_path, repeats)
+            size_mb = path.stat().st_size / 2**20
+            private = '-' if r['private_kb'] is None else f"{r['private_kb'] / 1024:.1f}"
+            shared = '-' if r['shared_kb'] is None else f"{r['shared_kb'] / 1024:.1f}"
+            print(f"{label:<30}{size_mb:>10.1f}{r['load_s'] * 1000:>10.1f}{private:>12}{shared:>11}")
+    print(f"Max abs prediction difference (float32 artifact vs sklearn): {max_err:.6f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '--worker':
+        _worker(*sys.argv[2:])
+    else:
+        main()
@@ -1,6 +1,8 @@
 """Train a LightGBM model on the processed data and output metrics.
 
-Saves a trained model as `models/lgb_model.pkl` and prints R2 and RMSE.
+Saves a trained model as `models/lgb_model.pkl` and prints R2 and RMSE. When
+the RandomForest fallback is used, a compact memory-mappable copy is also
+written to `models/rf_model.rfa` (see `model_artifact.py`) for serving.
 """
 from pathlib import Path
 import pandas as pd
@@ -9,6 +11,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score, mean_squared_error
 import joblib
 
+from model_artifact import save_forest_artifact
+
 # Try to import LightGBM; fall back to RandomForest if not available so script
 # runs in environments where LightGBM isn't installed.
 try:
@@ -77,6 +81,9 @@ def main():
     out_dir.mkdir(parents=True, exist_ok=True)
     joblib.dump(model, out_dir / 'lgb_model.pkl')
     print(f"Saved model to {out_dir / 'lgb_model.pkl'}")
+    if model._model_type == 'random_forest':
+        artifact = save_forest_artifact(model, out_dir / 'rf_model.rfa', quantize=True)
+        print(f"Saved compact artifact to {artifact}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,256 @@
+"""Compact, memory-mappable artifact format for tree-ensemble regressors.
+
+A fitted RandomForest pickled with joblib is large, and every serving worker
+that unpickles it keeps a private copy in memory. This module flattens the
+trees of a forest into a handful of contiguous arrays and writes them to a
+single binary file:
+
+    magic (8 bytes) | format version (uint32) | header length (uint32)
+    | JSON header | zero padding to 64 bytes | array payload
+
+The JSON header records the dtype, shape and offset of each array plus a
+SHA-256 checksum computed over the header itself (in canonical form, without
+the checksum field) followed by the payload. Loading maps the payload with `np.memmap`,
+so processes reading the same file share one page-cache copy instead of
+each holding their own.
+
+With `quantize=True` thresholds and leaf values are stored as float32.
+Thresholds are rounded down to the nearest float32, which keeps splits exact
+because sklearn trees compare float32 inputs; only leaf values lose precision.
+"""
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+MAGIC = b'RFARTIF\x00'
+FORMAT_VERSION = 2
+_PREFIX = struct.Struct('<8sII')
+_ALIGN = 64
+_CHUNK = 1 << 20
+
+# Order in which the arrays are laid out in the payload.
+_ARRAYS = ('children_left', 'children_right', 'feature', 'threshold', 'value', 'roots')
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact file is malformed, unsupported or corrupt."""
+
+
+def _round_down_float32(a: np.ndarray) -> np.ndarray:
+    """Cast to float32, picking the largest float32 <= each value."""
+    a32 = a.astype(np.float32)
+    up = a32.astype(np.float64) > a
+    a32[up] = np.nextafter(a32[up], np.float32(-np.inf))
+    return a32
+
+
+def _flatten_forest(model, quantize: bool) -> Dict[str, np.ndarray]:
+    """Concatenate the per-tree node arrays of a fitted forest."""
+    # Imported here so that loading an artifact only needs numpy.
+    from sklearn.ensemble._forest import ForestRegressor
+
+    # Only plain averaging forests (RandomForest/ExtraTrees regressors) map onto
+    # this format; boosting, bagging with feature subsets, classifiers and
+    # IsolationForest all predict differently and are rejected.
+    if not isinstance(model, ForestRegressor):
+        raise ArtifactError(f"Only forest regressors are supported, got {type(model).__name__}.")
+    estimators = getattr(model, 'estimators_', None)
+    if not estimators:
+        raise ArtifactError("Model is not fitted; `estimators_` is missing or empty.")
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ArtifactError("Only single-output regressors are supported.")
+
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for est in estimators:
+        tree = est.tree_
+        cl = tree.children_left.astype(np.int32)
+        cr = tree.children_right.astype(np.int32)
+        # Make child indices global; leaves stay at -1.
+        left.append(np.where(cl >= 0, cl + offset, -1).astype(np.int32))
+        right.append(np.where(cr >= 0, cr + offset, -1).astype(np.int32))
+        feature.append(tree.feature.astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        value.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+        offset += tree.node_count
+
+    threshold = np.concatenate(threshold)
+    value = np.concatenate(value)
+    if quantize:
+        threshold = _round_down_float32(threshold)
+        value = value.astype(np.float32)
+    return {
+        'children_left': np.concatenate(left),
+        'children_right': np.concatenate(right),
+        'feature': np.concatenate(feature),
+        'threshold': threshold,
+        'value': value,
+        'roots': np.asarray(roots, dtype=np.int64),
+    }
+
+
+def _canonical_header(meta: dict) -> bytes:
+    """Serialise the header deterministically, leaving out the checksum field."""
+    fields = {k: v for k, v in meta.items() if k != 'sha256'}
+    return json.dumps(fields, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _sha256(meta: dict, payload) -> str:
+    """Digest of the canonical header followed by the payload bytes."""
+    h = hashlib.sha256(_canonical_header(meta))
+    view = memoryview(payload).cast('B')
+    for start in range(0, len(view), _CHUNK):
+        h.update(view[start:start + _CHUNK])
+    return h.hexdigest()
+
+
+def save_forest_artifact(model, path: Union[str, Path], quantize: bool = True,
+                         feature_names: Optional[List[str]] = None) -> Path:
+    """Write a fitted forest regressor to `path` in the compact artifact format."""
+    arrays = _flatten_forest(model, quantize)
+    entries = {}
+    offset = 0
+    for name in _ARRAYS:
+        arr = np.ascontiguousarray(arrays[name])
+        # Keep every array aligned so memmap views need no copying.
+        offset = -(-offset // arr.itemsize) * arr.itemsize
+        entries[name] = {'dtype': arr.dtype.str, 'shape': list(arr.shape), 'offset': offset}
+        offset += arr.nbytes
+    payload = bytearray(offset)
+    for name in _ARRAYS:
+        arr = np.ascontiguousarray(arrays[name])
+        start = entries[name]['offset']
+        payload[start:start + arr.nbytes] = arr.tobytes()
+
+    if feature_names is None and hasattr(model, 'feature_names_in_'):
+        feature_names = [str(f) for f in model.feature_names_in_]
+    meta = {
+        'model_type': getattr(model, '_model_type', type(model).__name__),
+        'n_features': int(model.n_features_in_),
+        'feature_names': feature_names,
+        'n_trees': len(arrays['roots']),
+        'n_nodes': int(arrays['feature'].shape[0]),
+        'quantized': bool(quantize),
+        'arrays': entries,
+        'payload_size': len(payload),
+    }
+    meta['sha256'] = _sha256(meta, payload)
+    header = json.dumps(meta).encode('utf-8')
+
+    head_len = _PREFIX.size + len(header)
+    padding = -head_len % _ALIGN
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\x00' * padding)
+        f.write(payload)
+    return path
+
+
+def _check_header(meta, path: Path) -> None:
+    """Raise ArtifactError unless `meta` has every key the loader relies on."""
+    if not isinstance(meta, dict):
+        raise ArtifactError(f"{path} has a corrupt header: expected a JSON object.")
+    missing = [k for k in ('model_type', 'n_features', 'payload_size', 'sha256', 'arrays') if k not in meta]
+    if missing:
+        raise ArtifactError(f"{path} header is missing required keys: {', '.join(missing)}.")
+    if not isinstance(meta['arrays'], dict):
+        raise ArtifactError(f"{path} has a corrupt header: `arrays` must be a JSON object.")
+    for name in _ARRAYS:
+        entry = meta['arrays'].get(name)
+        if not isinstance(entry, dict) or not all(k in entry for k in ('dtype', 'shape', 'offset')):
+            raise ArtifactError(f"{path} header has a missing or incomplete entry for array `{name}`.")
+    if not isinstance(meta['payload_size'], int) or meta['payload_size'] <= 0:
+        raise ArtifactError(f"{path} has a corrupt header: invalid `payload_size`.")
+
+
+class CompactForest:
+    """Read-only forest regressor backed by a memory-mapped artifact file."""
+
+    def __init__(self, meta: dict, arrays: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.n_features_in_ = meta['n_features']
+        self.feature_names = meta.get('feature_names')
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self._model_type = meta['model_type']
+
+    def predict(self, X) -> np.ndarray:
+        """Average leaf values over all trees, matching RandomForestRegressor.predict."""
+        if self.feature_names and hasattr(X, 'columns'):
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected 2D input with {self.n_features_in_} features, got shape {X.shape}.")
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN; fill missing values before predicting.")
+
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        left = self.children_left[node]
+        active = left != -1
+        # Advance every (sample, tree) pair one level per pass until all hit a leaf.
+        while active.any():
+            n = node[active]
+            go_left = X[np.broadcast_to(rows, node.shape)[active], self.feature[n]] <= self.threshold[n]
+            node[active] = np.where(go_left, left[active], self.children_right[n])
+            left = self.children_left[node]
+            active = left != -1
+        return self.value[node].astype(np.float64).mean(axis=1)
+
+
+def load_forest_artifact(path: Union[str, Path], verify: bool = True) -> CompactForest:
+    """Memory-map an artifact written by `save_forest_artifact`.
+
+    With `verify=True` the checksum over the header and payload is checked
+    before any array view is built; this reads the file once but the pages
+    stay in the shared page cache.
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) != _PREFIX.size:
+            raise ArtifactError(f"{path} is too short to be a model artifact.")
+        magic, version, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ArtifactError(f"{path} is not a model artifact (bad magic bytes).")
+        if version != FORMAT_VERSION:
+            raise ArtifactError(f"{path} has artifact format version {version}; "
+                                f"this loader supports version {FORMAT_VERSION}.")
+        try:
+            meta = json.loads(f.read(header_len).decode('utf-8'))
+        except ValueError as e:
+            raise ArtifactError(f"{path} has a corrupt header: {e}") from e
+    _check_header(meta, path)
+
+    head_len = _PREFIX.size + header_len
+    data_start = head_len + (-head_len % _ALIGN)
+    if path.stat().st_size != data_start + meta['payload_size']:
+        raise ArtifactError(f"{path} is truncated or has trailing data.")
+    payload = np.memmap(path, dtype=np.uint8, mode='r', offset=data_start,
+                        shape=(meta['payload_size'],))
+    if verify and _sha256(meta, payload) != meta['sha256']:
+        raise ArtifactError(f"{path} failed checksum verification.")
+
+    arrays = {}
+    for name in _ARRAYS:
+        entry = meta['arrays'][name]
+        try:
+            dtype = np.dtype(entry['dtype'])
+            count = int(np.prod(entry['shape']))
+            start = entry['offset']
+            arrays[name] = payload[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+        except (TypeError, ValueError) as e:
+            raise ArtifactError(f"{path} has an invalid layout for array `{name}`: {e}") from e
+    return CompactForest(meta, arrays)